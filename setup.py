@@ -18,5 +18,5 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: Microsoft :: Windows",
     ],
-    install_requires=['scipy', 'numpy', 'pandas', 'seaborn', 'matplotlib', 'sympy']
+    install_requires=['scipy>=1.12', 'numpy', 'pandas', 'seaborn', 'matplotlib', 'sympy']
 )
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+from scipy.signal import butter, sosfiltfilt
+
+from thornpy.signal import low_pass
+
+FREQ_SAMP = 1e4
+TIME = np.arange(0, 10, 1/FREQ_SAMP)
+PASS_SIG = np.sin(2*np.pi*0.2*TIME)
+SIG = PASS_SIG + 0.5*np.sin(2*np.pi*50*TIME)
+
+
+class Test_LowPass(unittest.TestCase):
+
+    def test_low_pass_matches_float64_reference(self):
+        """Tests that low_pass matches a float64 sosfiltfilt reference when the cutoff is a small fraction of the sample rate
+        """
+        filtered, _ = low_pass(SIG, TIME, 0.5, N=8)
+        expected = sosfiltfilt(butter(8, 0.5/FREQ_SAMP*2, output='sos'), SIG)
+        np.testing.assert_allclose(filtered, expected, rtol=0, atol=1e-6)
+
+    def test_low_pass_removes_high_frequency(self):
+        """Tests that low_pass keeps a low frequency sine and removes a high frequency one
+        """
+        filtered, _ = low_pass(SIG, TIME, 5)
+
+        # Compare away from the ends of the signal
+        np.testing.assert_allclose(filtered[10000:-10000], PASS_SIG[10000:-10000], rtol=0, atol=1e-5)
+
+    def test_low_pass_returns_array(self):
+        time = list(np.arange(0, 1, 1e-3))
+        filtered, filtered_time = low_pass(list(np.ones(len(time))), time, 10)
+
+        self.assertIsInstance(filtered, np.ndarray)
+        self.assertIs(filtered_time, time)
@@ -9,6 +9,8 @@ INT_STRING = '1'
 NEG_INT_STRING = '-1'
 CHAR_STRING = 'lskfsd'
 EMPTY_STRING = ''
+MISPLACED_SIGN_INT_STRING = '1-2'
+MISPLACED_SIGN_FLOAT_STRING = '1.-2'
 
 class Test_StrIsFloat(unittest.TestCase):
     """Tests that numtype.str_is_float() returns correct booleans
@@ -26,6 +28,11 @@ class Test_StrIsFloat(unittest.TestCase):
         """
         self.assertFalse(numtype.str_is_float(INT_STRING))
 
+    def test_misplaced_sign(self):
+        """Test that str_is_float() returns false when the minus sign is not leading
+        """
+        self.assertFalse(numtype.str_is_float(MISPLACED_SIGN_FLOAT_STRING))
+
     def tearDown(self):
         return
 
@@ -46,6 +53,11 @@ class Test_StrIsInt(unittest.TestCase):
         """
         self.assertFalse(numtype.str_is_int(FLOAT_STRING))
 
+    def test_misplaced_sign(self):
+        """Test that str_is_int() returns false when the minus sign is not leading
+        """
+        self.assertFalse(numtype.str_is_int(MISPLACED_SIGN_INT_STRING))
+
     def tearDown(self):
         return
 
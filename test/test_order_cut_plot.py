@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from thornpy.signal import _find_nearest, _order_cut_plot
+
+FREQS = [0, 10, 20, 30, 40]
+
+
+class Test_FindNearest(unittest.TestCase):
+
+    def test_scalar(self):
+        self.assertEqual(_find_nearest(FREQS, 12), 1)
+
+    def test_array(self):
+        np.testing.assert_array_equal(_find_nearest(FREQS, [3, 17, 26, 39]), [0, 2, 3, 4])
+
+    def test_boundaries(self):
+        np.testing.assert_array_equal(_find_nearest(FREQS, [-5, 0, 40, 45]), [0, 0, 4, 4])
+
+    def test_single_element(self):
+        self.assertEqual(_find_nearest([5.0], 3), 0)
+        np.testing.assert_array_equal(_find_nearest([5.0], [3, 5, 7]), [0, 0, 0])
+
+    def test_ties(self):
+        """Tests that ties resolve to the lower index, like `np.argmin`
+        """
+        values = [5, 15, 35]
+        expected = [np.abs(np.array(FREQS) - v).argmin() for v in values]
+        np.testing.assert_array_equal(_find_nearest(FREQS, values), expected)
+
+
+class Test_OrderCutPlot(unittest.TestCase):
+
+    def test_amplitudes_from_matching_time_bin(self):
+        """Tests that each amplitude is read from the time bin its speed came from
+        """
+        # 100 Hz is out of range, so the first bin is dropped
+        input_sig = [6000, 600, 1200, 1800]
+
+        # Encode the frequency index and time bin in each value
+        Pxx = np.add.outer(np.arange(len(FREQS)), 100*np.arange(len(input_sig)))
+
+        fig = _order_cut_plot(input_sig, FREQS, Pxx, [1, 2])
+        order_1, order_2 = [ax.get_lines()[0] for ax in fig.axes]
+
+        np.testing.assert_array_equal(order_1.get_xdata(), [600, 1200, 1800])
+        np.testing.assert_array_equal(order_1.get_ydata(), [101, 202, 303])
+        np.testing.assert_array_equal(order_2.get_xdata(), [600, 1200])
+        np.testing.assert_array_equal(order_2.get_ydata(), [102, 204])
+
+    def tearDown(self):
+        plt.close('all')
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+from scipy.signal import spectrogram
+
+from thornpy.signal import _spectrogram, _window_vec, _STFT_CHUNK
+
+F_S = 1e4
+N_SAMPLES = 100000
+
+
+class Test_Spectrogram(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.sig = rng.standard_normal(N_SAMPLES) + 1
+
+    def test_magnitude(self):
+        self._check(1024, 768, psd=False)
+
+    def test_psd(self):
+        self._check(1024, 768, psd=True)
+
+    def test_magnitude_odd_n_fft(self):
+        self._check(255, 153, psd=False)
+
+    def test_psd_odd_n_fft(self):
+        self._check(255, 153, psd=True)
+
+    def _check(self, n_fft, n_overlap, psd):
+        """Checks `_spectrogram` against `scipy.signal.spectrogram` over more than one chunk of slices
+        """
+        freqs, bins, Pxx = _spectrogram(self.sig, F_S, n_fft, n_overlap, 'hanning', psd)
+        exp_freqs, exp_bins, exp_Pxx = spectrogram(
+            self.sig.astype(np.float32),
+            fs=F_S,
+            window=_window_vec('hanning', n_fft),
+            nperseg=n_fft,
+            noverlap=n_overlap,
+            detrend='constant',
+            scaling='density' if psd else 'spectrum',
+            mode='psd' if psd else 'magnitude'
+        )
+
+        self.assertGreater(Pxx.shape[1], _STFT_CHUNK)
+        self.assertEqual(Pxx.shape, exp_Pxx.shape)
+        self.assertEqual(Pxx.dtype, np.float32)
+        np.testing.assert_allclose(freqs, exp_freqs)
+        np.testing.assert_allclose(bins, exp_bins, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(Pxx, exp_Pxx, rtol=0, atol=1e-5*exp_Pxx.max())
@@ -0,0 +1,18 @@
+import unittest
+
+from thornpy.signal import step_function
+
+
+class Test_StepFunction(unittest.TestCase):
+
+    def test_step_function(self):
+        step = step_function([2, 3, 3.5, 4, 5], 3, 0, 4, 1)
+        self.assertListEqual(step, [0.0, 0.0, 0.5, 1.0, 1.0])
+
+    def test_step_function_unsorted_index(self):
+        step = step_function([5, 3.5, 2], 3, 0, 4, 1)
+        self.assertListEqual(step, [1.0, 0.5, 0.0])
+
+    def test_step_function_zero_width(self):
+        step = step_function([2, 3, 4], 3, 0, 3, 1)
+        self.assertListEqual(step, [0.0, 0.0, 1.0])
@@ -15,6 +15,10 @@ class Test_Utilities(unittest.TestCase):
     def test_num_to_ith(self):
         ordinals = [utilities.num_to_ith(num) for num in TEST_INTEGERS]
         self.assertEqual(ordinals, TEST_EXPECTED_ORDINALS)
+
+    def test_num_to_ith_float(self):
+        ordinals = [utilities.num_to_ith(float(num)) for num in TEST_INTEGERS]
+        self.assertEqual(ordinals, TEST_EXPECTED_ORDINALS)
     
     def test_read_data_string_with_headers(self):
         data = utilities.read_data_string(TEST_DATA_STRING)
@@ -23,6 +27,30 @@ class Test_Utilities(unittest.TestCase):
     def test_read_data_string_without_headers(self):
         data = utilities.read_data_string(TEST_DATA_STRING, has_headerline=False)
         self.assertListEqual(data, TEST_EXPECTED_DATA_DICT_WITHOUT_HEADERS)
+
+    def test_read_data_string_stray_quote(self):
+        data = utilities.read_data_string('Part,Len\n"bolt,12\nnut,3\nwasher,1\n')
+        self.assertListEqual(data, [
+            {'Part': '"bolt', 'Len': '12'},
+            {'Part': 'nut', 'Len': '3'},
+            {'Part': 'washer', 'Len': '1'}
+        ])
+
+    def test_read_data_string_values_unchanged(self):
+        data = utilities.read_data_string('A,B\n1,"2\n"q"x,1\n3,4\r')
+        self.assertListEqual(data, [
+            {'A': '1', 'B': '"2'},
+            {'A': '"q"x', 'B': '1'},
+            {'A': '3', 'B': '4\r'}
+        ])
+
+    def test_read_data_string_blank_single_column_rows(self):
+        data = utilities.read_data_string('A\n1\n\n2')
+        self.assertListEqual(data, [{'A': '1'}, {'A': ''}, {'A': '2'}])
+
+    def test_read_data_string_multicharacter_delimiter(self):
+        data = utilities.read_data_string('A, B\n1, 2\n', delimiter=', ')
+        self.assertListEqual(data, [{'A': '1', 'B': '2'}])
     
     def test_convert_path_windows(self):
         """Tests that utilities.convert_path works as expected.
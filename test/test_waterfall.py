@@ -1,10 +1,14 @@
 import os
 import unittest
+import warnings
+from unittest import mock
 
+import numpy as np
 from pandas import read_csv
 import matplotlib.pylab as plt
 
-from thornpy.signal import fft_watefall
+from thornpy import signal
+from thornpy.signal import fft_watefall, _min_positive, _spectrogram, _STFT_CHUNK
 
 DATA_FILENAME = os.path.join(os.getcwd(), 'test', 'files', 'waterfall', 'LC3_aluminum_pt1_accel_X.csv')
 
@@ -36,6 +40,99 @@ class Test_Waterfall(unittest.TestCase):
         time, rpm, response = _get_data()
         return fft_watefall(time, response, percent_overlap=75, n_fft=1024, t_min=6.25, t_max=10, z_scale=z_scale, f_range=[0, 500], return_order_cuts=[1, 40, 63, 80], order_lines=[1, 40, 63, 80], input_sig=rpm, input_conversion_factor=1, response_unit='g', vmin=vmin, vmax=vmax)
 
+class Test_WaterfallDbZeros(unittest.TestCase):
+
+    def test_min_positive(self):
+        Pxx = np.arange(1, 3*_STFT_CHUNK + 1, dtype=np.float32).reshape(1, -1) + 0.5
+        Pxx[:, :_STFT_CHUNK + 10] = 0
+        self.assertEqual(_min_positive(Pxx), _STFT_CHUNK + 11.5)
+        self.assertEqual(_min_positive(np.zeros((2, 2*_STFT_CHUNK), dtype=np.float32)), np.inf)
+
+    def test_db_zeros_clipped_to_data(self):
+        """Tests that exact zeros in the spectrum don't set the dB color scale far below the rest of the data
+        """
+        time = np.arange(0, 2, 1e-3)
+        sig = np.sin(2*np.pi*50*time)
+        sig[:1000] = 0
+        f_s = (len(time) - 1)/(time[-1] - time[0])
+
+        for psd in [False, True]:
+            _, _, Pxx = _spectrogram(sig, f_s, 256, 128, 'hanning', psd)
+            self.assertTrue((Pxx == 0).any())
+            expected_vmin = np.log10(Pxx[Pxx > 0].min()) * (10 if psd else 20)
+
+            wtrfl, *_ = fft_watefall(time, sig, n_fft=256, z_scale='dB', psd=psd)
+            values = wtrfl.axes[1].collections[0].get_array()
+
+            # Zeros are clipped to the smallest value in the data rather than a much lower floor
+            self.assertTrue(np.isfinite(values).all())
+            self.assertAlmostEqual(values.min(), expected_vmin, places=3)
+            self.assertAlmostEqual(wtrfl.axes[1].collections[0].get_clim()[0], expected_vmin, places=3)
+
+            plt.close(wtrfl)
+
+class Test_WaterfallOrderChart(unittest.TestCase):
+
+    def setUp(self):
+        self.time = np.arange(0, 10, 1e-3)
+        self.sig = np.sin(2*np.pi*50*self.time)
+
+        # Oscillating input speed (not monotonic)
+        self.rpm = 1000 + 500*np.sin(2*np.pi*0.3*self.time)
+
+    def test_pcolormesh(self):
+        self._check('pcolormesh')
+
+    def test_contourf(self):
+        self._check('contourf')
+
+    def _check(self, plot_kind):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            wtrfl, _time, _sig, rpm, order_cuts = fft_watefall(self.time, self.sig, n_fft=256, input_sig=self.rpm, input_conversion_factor=1, response_unit='g', plot_kind=plot_kind, order_lines=[1, 2], return_order_cuts=[1, 2])
+
+        np.testing.assert_array_equal(rpm, self.rpm)
+        self.assertEqual(len(order_cuts.axes), 2)
+
+        # The order chart spans the sorted input speeds
+        x_lim = wtrfl.axes[2].get_xlim()
+        self.assertLessEqual(x_lim[0], self.rpm.min() + 50)
+        self.assertGreaterEqual(x_lim[1], self.rpm.max() - 50)
+
+    def tearDown(self):
+        plt.close('all')
+
+class Test_WaterfallPyfftw(unittest.TestCase):
+
+    def setUp(self):
+        self.time = np.arange(0, 2, 1e-3)
+        self.sig = np.sin(2*np.pi*50*self.time)
+
+    def test_missing_pyfftw_raises(self):
+        with mock.patch.object(signal, 'pyfftw', None):
+            with self.assertRaises(ImportError):
+                fft_watefall(self.time, self.sig, n_fft=256, use_pyfftw=True)
+
+    @unittest.skipUnless(signal.pyfftw, 'pyfftw is not installed')
+    def test_pyfftw_matches_default(self):
+        num_threads = signal.pyfftw.config.NUM_THREADS
+
+        wtrfl, *_ = fft_watefall(self.time, self.sig, n_fft=256)
+        wtrfl_pyfftw, *_ = fft_watefall(self.time, self.sig, n_fft=256, use_pyfftw=True)
+
+        np.testing.assert_allclose(
+            wtrfl_pyfftw.axes[1].collections[0].get_array(),
+            wtrfl.axes[1].collections[0].get_array(),
+            rtol=0,
+            atol=1e-6
+        )
+
+        # The global pyfftw thread count is left unchanged
+        self.assertEqual(signal.pyfftw.config.NUM_THREADS, num_threads)
+
+    def tearDown(self):
+        plt.close('all')
+
 def _get_data():
     data = read_csv(DATA_FILENAME)
     
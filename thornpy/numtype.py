@@ -1,5 +1,12 @@
 """numtype contains functions for checking the type of number that is contained within a string.
 """
+import re
+
+_POS_NUM_RE = re.compile(r'(\d+\.?\d*|\.\d+)')
+_FLOAT_RE = re.compile(r'-?(\d+\.\d*|\.\d+)')
+_POS_FLOAT_RE = re.compile(r'(\d+\.\d*|\.\d+)')
+_INT_RE = re.compile(r'-?\d+')
+_POS_INT_RE = re.compile(r'\d+')
 
 def str_is_num(string):
     """Returns True if string is a number
@@ -35,12 +42,7 @@ def str_is_pos_num(string):
         True if string represents a positive number
 
     """
-    is_numeric = False
-    if string:
-        # If the string is not empty check if it contains numbers
-        if string.replace('.','',1).isdigit():
-            is_numeric = True    
-    return is_numeric
+    return bool(string) and _POS_NUM_RE.fullmatch(string) is not None
 
 
 def str_is_float(numeric_string):
@@ -56,14 +58,7 @@ def str_is_float(numeric_string):
     bool
         True if the string is a float
     """
-    is_float = False
-    if numeric_string:
-        # If the string is not empty check if it contains numbers
-        if numeric_string.replace('.','',1).replace('-','',1).isdigit():
-            # If the string contains numbers, check if it contains a decimal
-            if '.' in numeric_string:
-                is_float = True
-    return is_float
+    return bool(numeric_string) and _FLOAT_RE.fullmatch(numeric_string) is not None
 
 def str_is_int(numeric_string):
     """Returns true if the string is an integer
@@ -78,11 +73,7 @@ def str_is_int(numeric_string):
     bool
         True if the string is an integer
     """
-    is_int = False
-    if numeric_string:
-        if numeric_string.replace('-','',1).isdigit():
-            is_int = True
-    return is_int
+    return bool(numeric_string) and _INT_RE.fullmatch(numeric_string) is not None
 
 def str_is_pos_float(numeric_string):
     """Returns true if the string is a positive float
@@ -97,14 +88,7 @@ def str_is_pos_float(numeric_string):
     bool
         True if the string is a positive float
     """
-    is_float = False
-    if numeric_string:
-        # If the string is not empty check if it contains numbers
-        if numeric_string.replace('.','',1).isdigit():
-            # If the string contains numbers, check if it contains a decimal
-            if '.' in numeric_string:
-                is_float = True
-    return is_float
+    return bool(numeric_string) and _POS_FLOAT_RE.fullmatch(numeric_string) is not None
 
 def str_is_pos_int(numeric_string):
     """Returns true if the string is a positive integer
@@ -119,8 +103,4 @@ def str_is_pos_int(numeric_string):
     bool
         True if the string is a positive integer
     """
-    is_int = False
-    if numeric_string:
-        if numeric_string.isdigit():
-            is_int = True
-    return is_int
+    return bool(numeric_string) and _POS_INT_RE.fullmatch(numeric_string) is not None
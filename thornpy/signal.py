@@ -1,14 +1,27 @@
 """Signal processing module
 """
-from scipy.signal import butter, filtfilt, find_peaks
+import os
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+import scipy.fft
+from scipy.signal import butter, sosfiltfilt, find_peaks, ShortTimeFFT
 from scipy.signal.windows import hann, hamming, blackman, boxcar
 import matplotlib.pyplot as plt
 from matplotlib import cm  
 from matplotlib.colors import Normalize
+from matplotlib.collections import LineCollection
 from matplotlib.lines import Line2D
 import numpy as np
 import pandas as pd
 
+try:
+    import pyfftw.interfaces.scipy_fft
+except ImportError:
+    pyfftw = None
+
+# Number of FFT slices computed per chunk when building a spectrogram
+_STFT_CHUNK = 256
+
 def autocorr(x):
     x = np.array(x)
     n = x.size
@@ -33,9 +46,14 @@ def low_pass(sig, time, freq_cutoff, N=5):
     N : int
         Order of butterworth filter (default is 5)
     
+    Note
+    ----
+    The filter is applied in second-order sections. The filtered signal is returned as a
+    :class:`numpy.ndarray` rather than a list.
+
     Returns
     -------
-    list
+    ndarray
         Filtered signal
     list
         Time signal associated with filtered signal
@@ -43,8 +61,8 @@ def low_pass(sig, time, freq_cutoff, N=5):
     """
     freq_samp = (len(time)-1)/(time[-1]-time[0])
     omega = freq_cutoff/freq_samp*2
-    b_coef, a_coef = butter(N, omega)
-    return list(filtfilt(b_coef, a_coef, sig)), time
+    sos = butter(N, omega, output='sos')
+    return sosfiltfilt(sos, np.asarray(sig, dtype=float)), time
         
 def step_function(index, start, init_val, end, final_val):
     """Approximates the Heaviside step function with a cubic polynomial.
@@ -54,7 +72,7 @@ def step_function(index, start, init_val, end, final_val):
     >>> x = [2, 3, 3.5, 4, 5]
     >>> start = 3
     >>> init_val = 0
-    >>> end = 3
+    >>> end = 4
     >>> final_val = 1
     >>> step_function(x, start, init_val, end, final_val)
     [0.0, 0.0, 0.5, 1.0, 1.0]
@@ -78,13 +96,27 @@ def step_function(index, start, init_val, end, final_val):
         Resulting step function
 
     """
+    ind = np.asarray(index, dtype=float)
     height = final_val - init_val
-    step =  [init_val for ind in index if ind <= start]    
-    step += [init_val + height*((ind-start)/(end-start))**2 * (3-2*((ind-start)/(end-start))) for ind in index if start < ind < end]
-    step += [final_val for ind in index if ind >= end]
-    return step
 
-def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=None, t_max=None, input_sig=None, input_conversion_factor=60/360, input_unit='RPM', response_unit=None, response_conversion_factor=1, psd=False, z_scale='linear', order_lines=None, f_range=None, clean_sig=None, return_order_cuts=None, vmin=None, vmax=None):
+    if end == start:
+        # Degenerate case is a true step
+        step = np.where(ind <= start, init_val, final_val).astype(float)
+    else:
+        # Normalized position through the step (updated in place to avoid temporaries)
+        u = ind - start
+        u /= end - start
+        np.clip(u, 0.0, 1.0, out=u)
+
+        step = 3 - 2*u
+        step *= u
+        step *= u
+        step *= height
+        step += init_val
+
+    return step.tolist()
+
+def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=None, t_max=None, input_sig=None, input_conversion_factor=60/360, input_unit='RPM', response_unit=None, response_conversion_factor=1, psd=False, z_scale='linear', order_lines=None, f_range=None, clean_sig=None, return_order_cuts=None, vmin=None, vmax=None, window='hanning', use_pyfftw=False, plot_kind='pcolormesh'):
     """Genenerates a waterfall plot from data in an Adams result or request file.
     
     Parameters
@@ -133,6 +165,13 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
         If given, removes data points that exceed `clean_sig` multiplied by the standard deviation of the signal.
     title : str, optional
         Plot title, by default None.
+    use_pyfftw : bool, optional
+        If True, computes the FFTs with pyFFTW using all CPUs. Requires the optional `pyfftw`
+        package. Note that this enables pyFFTW's (process wide) interface cache so that FFT plans
+        are reused between calls, by default False
+    plot_kind : str, optional
+        How the waterfall surfaces are drawn. 'pcolormesh' draws a single raster. 'contourf' draws
+        filled contours (slower for large spectra), by default 'pcolormesh'
     
     Returns
     -------
@@ -140,9 +179,17 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
         Waterfall plot
 
     """    
+    if plot_kind not in ['pcolormesh', 'contourf']:
+        raise ValueError(f'{plot_kind} not recognized as a plot kind!')
+
+    sig = np.asarray(sig)
+    if np.iscomplexobj(sig):
+        raise ValueError('The response signal must be real valued!')
+    sig = sig.astype(float, copy=False)
+
     # Convert to other unis (for converting to Gs)
-    if response_conversion_factor is not None:
-        sig = [v*response_conversion_factor for v in sig]
+    if response_conversion_factor is not None and response_conversion_factor != 1:
+        sig = sig*response_conversion_factor
         
     if clean_sig is not None:
         sig, i_removed, dirty_sig = _clean_sig(sig, clean_sig)
@@ -151,28 +198,29 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
 
     t_s = (time[-1] - time[0])/(len(time) - 1)
     f_s = 1/t_s
-    
-    _fig, (ax1, ax2) = plt.subplots(nrows=2)
-    ax1.plot(time, sig)
 
-    Pxx, freqs, bins, im = ax2.specgram(sig, NFFT=n_fft, Fs=f_s, noverlap=percent_overlap/100*n_fft, detrend='mean', mode='magnitude' if psd is False else 'psd', scale=z_scale, cmap='nipy_spectral')
-    # The `specgram` method returns 4 objects. They are:
-    # - Pxx: the periodogram
+    if use_pyfftw is True and pyfftw is None:
+        raise ImportError('pyfftw must be installed to use `use_pyfftw=True`!')
+
+    with _pyfftw_backend() if use_pyfftw is True else nullcontext():
+        freqs, bins, Pxx = _spectrogram(sig, f_s, n_fft, int(percent_overlap/100*n_fft), window, psd)
+    # The `_spectrogram` function returns 3 objects. They are:
     # - freqs: the frequency vector
     # - bins: the centers of the time bins
-    # - im: the matplotlib.image.AxesImage instance representing the data in the plot
-    _fig.clear()
-    plt.close()    
-    del _fig
+    # - Pxx: the spectrogram (linear scale)
 
     # Convert to dB
     if z_scale.lower() == 'db':
-        Pxx = np.log10(Pxx) * (20 if psd is False else 10)
+        # Clip exact zeros to the smallest value in the data so the log doesn't produce -inf
+        # or a floor far below the rest of the data
+        floor = _min_positive(Pxx)
+        np.maximum(Pxx, floor if np.isfinite(floor) else np.finfo(Pxx.dtype).tiny, out=Pxx)
+        np.log10(Pxx, out=Pxx)
+        Pxx *= 20 if psd is False else 10
 
     # ----------------
     # Signal
     # ----------------
-    x_wtrfl, y_wtrfl = np.meshgrid(bins+time[0], freqs)
     fig, axes = plt.subplots(nrows=2 if input_sig is None else 3)
         
     axes[0].plot(time, sig, zorder=2)
@@ -181,7 +229,7 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
     
     # if clean_sig is not None:
     #     axes[0].plot(time, dirty_sig, '--', linewidth=1, zorder=1)
-    #     axes[0].plot([time[i] for i in i_removed], [sig[i] for i in i_removed], '.', markersize=3, zorder=3)
+    #     axes[0].plot(np.asarray(time)[i_removed], sig[i_removed], '.', markersize=3, zorder=3)
 
     axes[0].set_xlim(time[0], time[-1])
     axes[0].set_ylim(y_lim[0], y_lim[1])
@@ -203,12 +251,15 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
             vmin = Pxx.min()
         if vmax is None:
             vmax = Pxx.max()
-        cmap = cm.get_cmap('nipy_spectral', 100)
-        wtrfl_surf = axes[1].contourf(x_wtrfl, y_wtrfl, Pxx, 250, cmap=cmap, extend='both', vmin=vmin, vmax=vmax)
+        cmap = plt.get_cmap('nipy_spectral', 100)
+        if plot_kind == 'pcolormesh':
+            wtrfl_surf = axes[1].pcolormesh(bins+time[0], freqs, Pxx, shading='auto', cmap=cmap, vmin=vmin, vmax=vmax)
+        else:
+            wtrfl_surf = axes[1].contourf(bins+time[0], freqs, Pxx, 250, cmap=cmap, extend='both', vmin=vmin, vmax=vmax)
         axes[1].set_xlim(time[0], time[-1])
         axes[1].set_xlabel('Time (s)')
         axes[1].set_ylabel('Frequency (Hz)')
-        axes[1].set_grid(True)
+        axes[1].grid(True)
         # wtrfl_fig.colorbar(wtrfl_surf)
 
     else:        
@@ -218,9 +269,11 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
         if len(input_sig) != len(time):
             raise ValueError('Input signal must be the same lenght as the response signel.')
 
-        input_sig_rpm = [abs(v*input_conversion_factor) for v in input_sig]
-        input_bins = [abs(input_sig_rpm[np.argmax(time>=t_bn+time[0])]) for t_bn in bins]
-        x_order, y_order = np.meshgrid(input_bins, freqs)
+        input_sig_rpm = np.abs(np.asarray(input_sig)*input_conversion_factor)
+
+        # Input speed at the first time step at or after each bin center
+        i_bins = np.searchsorted(time, bins + time[0])
+        input_bins = input_sig_rpm[np.clip(i_bins, 0, len(time)-1)]
         
         # Plot Input Signal
         axes[1].plot(time, input_sig_rpm)
@@ -232,8 +285,8 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
 
         # Plot Order Waterfall
         if f_range is not None:
-            i_min = int(np.argmax(freqs>=f_range[0])) if min(freqs)<f_range[0] else 0
-            i_max = int(np.argmax(freqs>=f_range[1])) if max(freqs)>f_range[1] else len(freqs)
+            i_min = int(np.searchsorted(freqs, f_range[0], side='left'))
+            i_max = int(np.searchsorted(freqs, f_range[1], side='right'))
         else:
             i_min = 0
             i_max = len(freqs)
@@ -242,8 +295,14 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
             vmin = Pxx[i_min:i_max].min()
         if vmax is None:
             vmax = Pxx[i_min:i_max].max()
-        cmap = cm.get_cmap('nipy_spectral', 100)
-        wtrfl_surf = axes[2].contourf(x_order[i_min:i_max], y_order[i_min:i_max], Pxx[i_min:i_max], 250, cmap=cmap, extend='both', vmin=vmin, vmax=vmax)
+        cmap = plt.get_cmap('nipy_spectral', 100)
+
+        # Sort the bins by input speed, which isn't monotonic for run down or oscillating speeds
+        i_sort = np.argsort(input_bins, kind='stable')
+        if plot_kind == 'pcolormesh':
+            wtrfl_surf = axes[2].pcolormesh(input_bins[i_sort], freqs[i_min:i_max], Pxx[i_min:i_max, i_sort], shading='auto', cmap=cmap, vmin=vmin, vmax=vmax)
+        else:
+            wtrfl_surf = axes[2].contourf(input_bins[i_sort], freqs[i_min:i_max], Pxx[i_min:i_max, i_sort], 250, cmap=cmap, extend='both', vmin=vmin, vmax=vmax)
         axes[2].set_xlabel(input_unit)
         axes[2].set_ylabel('Frequency (Hz)')
 
@@ -260,7 +319,7 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
         sm = cm.ScalarMappable(norm=Normalize(vmin, vmax), cmap=cmap)
         sm.set_array([vmin, vmax])
         sm.autoscale()
-        cbar = fig.colorbar(sm, ticks=np.linspace(vmin, vmax, 10))
+        cbar = fig.colorbar(sm, ax=axes[2], ticks=np.linspace(vmin, vmax, 10))
         cbar.set_label(y_label)
 
         # Generate Order Cut Plots
@@ -279,6 +338,96 @@ def fft_watefall(time, sig, percent_overlap=50, n_fft=1024, title=None, t_min=No
     else:
         return (fig, time, sig, input_sig_rpm, order_cuts)
 
+def _min_positive(Pxx):
+    """Returns the smallest positive value in the 2-D array `Pxx` (inf if there are none).
+
+    The columns are scanned `_STFT_CHUNK` at a time so that no full-size mask or copy of `Pxx` is
+    made.
+
+    Parameters
+    ----------
+    Pxx : ndarray
+        Spectrogram (frequency x time)
+
+    Returns
+    -------
+    float
+        Smallest positive value
+
+    """
+    min_positive = np.inf
+    for p_0 in range(0, Pxx.shape[1], _STFT_CHUNK):
+        slab = Pxx[:, p_0:p_0 + _STFT_CHUNK]
+        min_positive = min(min_positive, slab.min(where=slab > 0, initial=np.inf))
+    return min_positive
+
+@contextmanager
+def _pyfftw_backend():
+    """Context manager that computes :mod:`scipy.fft` transforms with pyFFTW using all CPUs.
+
+    The number of threads is set with :func:`scipy.fft.set_workers` so that the global
+    `pyfftw.config.NUM_THREADS` is left unchanged.
+
+    """
+    pyfftw.interfaces.cache.enable()
+    with scipy.fft.set_backend(pyfftw.interfaces.scipy_fft), scipy.fft.set_workers(os.cpu_count()):
+        yield
+
+def _spectrogram(sig, f_s, n_fft, n_overlap, window, psd):
+    """Computes the one-sided magnitude or PSD spectrogram of the real signal `sig`.
+
+    The FFTs are computed `_STFT_CHUNK` slices at a time and written into a preallocated float32
+    array, so the complex STFT of the whole signal is never held in memory. Only full segments
+    are used, as in :func:`scipy.signal.spectrogram`.
+
+    Parameters
+    ----------
+    sig : ndarray
+        Signal
+    f_s : float
+        Sample frequency in Hz
+    n_fft : int
+        Number of points used in each FFT
+    n_overlap : int
+        Number of points of overlap between segments
+    window : str
+        Type of window used for each FFT. See :func:`get_window`
+    psd : bool
+        If True returns the PSD. If False returns the magnitude
+
+    Returns
+    -------
+    ndarray
+        Frequencies
+    ndarray
+        Times of the segment centers relative to the start of `sig`
+    ndarray
+        Spectrogram (frequency x time)
+
+    """
+    sig = np.asarray(sig, dtype=np.float32)
+    hop = n_fft - n_overlap
+
+    # Scaling the one-sided spectrum by 2X keeps the PSD's total power
+    sft = ShortTimeFFT(_window_vec(window, n_fft), hop, f_s, fft_mode='onesided2X' if psd is True else 'onesided', scale_to='psd' if psd is True else 'magnitude')
+
+    # Offset the slices so that slice p starts at sample p*hop
+    k_offset = sft.m_num_mid
+    n_slices = (len(sig) - n_fft)//hop + 1
+
+    Pxx = np.empty((sft.f.size, n_slices), dtype=np.float32)
+    for p_0 in range(0, n_slices, _STFT_CHUNK):
+        p_1 = min(p_0 + _STFT_CHUNK, n_slices)
+        stft = sft.stft_detrend(sig, 'constant', p_0, p_1, k_offset=k_offset)
+        np.abs(stft, out=Pxx[:, p_0:p_1])
+        if psd is True:
+            np.square(Pxx[:, p_0:p_1], out=Pxx[:, p_0:p_1])
+
+    # Slice centers are at `m_num_mid` (n_fft//2). Report them at n_fft/2 like scipy.signal.spectrogram
+    bins = sft.t(len(sig), 0, n_slices, k_offset=k_offset) + (n_fft/2 - sft.m_num_mid)/f_s
+
+    return sft.f, bins, Pxx
+
 def check_num_points(num, n_fft):    
     if num < n_fft:
         for pow_2 in [2**e for e in range(100)][::-1]:
@@ -301,6 +450,29 @@ def get_window(window):
         raise ValueError(f'{window} not recognized as a window!')    
     return win
 
+@lru_cache(maxsize=16)
+def _window_vec(window, n):
+    """Returns the `n` point `window` as a read-only float32 array.
+
+    Cached so that repeated FFTs of the same size don't rebuild the window.
+
+    Parameters
+    ----------
+    window : str
+        Type of window. See :func:`get_window`
+    n : int
+        Number of points in the window
+
+    Returns
+    -------
+    ndarray
+        Window coefficients
+
+    """
+    win = get_window(window)(n).astype(np.float32)
+    win.flags.writeable = False
+    return win
+
 def _add_order_lines(ax, orders, input_unit):
     """Adds order fan lines to ax at each order in `orders`.
     
@@ -315,23 +487,30 @@ def _add_order_lines(ax, orders, input_unit):
 
     """
     input_to_hz = _get_conversion_to_hz(input_unit)
+
+    # Get the limits before turning off autoscaling so that they reflect the plotted data
+    x_max = ax.get_xlim()[-1]
+    y_max = ax.get_ylim()[-1]
     ax.autoscale(False)
 
+    box_props = dict(boxstyle='round', pad=.3, fc='white', ec='black')
+    segments = []
     for order in orders:        
-        x_coords = [0, ax.get_xlim()[-1]]
+        x_coords = [0, x_max]
         y_coords = [0, x_coords[-1]*input_to_hz*order]
 
-        if y_coords[-1] > ax.get_ylim()[-1]:
-            y_coords[-1] = ax.get_ylim()[-1]
+        if y_coords[-1] > y_max:
+            y_coords[-1] = y_max
             x_coords[-1] = y_coords[-1]/input_to_hz/order
 
-        # Add line
-        ax.plot(x_coords, y_coords, color='white', linestyle='-', linewidth=2, alpha=.75)
+        segments.append(list(zip(x_coords, y_coords)))
 
         # Add annotation
-        box_props = dict(boxstyle='round', pad=.3, fc='white', ec='black')
         ax.annotate(f'{order:.0f}', (x_coords[-1], y_coords[-1]), bbox=box_props)
 
+    # Add lines
+    ax.add_collection(LineCollection(segments, colors='white', linestyles='-', linewidths=2, alpha=.75), autolim=False)
+
 def _get_conversion_to_hz(input_unit):
     """Given a unit returns the factor to convert to Hz.
     
@@ -359,11 +538,12 @@ def _get_conversion_to_hz(input_unit):
 def _clean_sig(sig, n_sigma):
     cleaned_sig = np.array(sig)
     i_pks, _ = find_peaks(np.abs(cleaned_sig), prominence=np.std(cleaned_sig)*n_sigma)
+    i_pks = i_pks[(i_pks > 0) & (i_pks < len(cleaned_sig)-1)]
 
-    for i_pk in i_pks:
-        cleaned_sig[i_pk] = np.mean([cleaned_sig[i_pk-1], cleaned_sig[i_pk+1]])
+    # Replace each peak with the mean of its neighbors
+    cleaned_sig[i_pks] = 0.5*(cleaned_sig[i_pks-1] + cleaned_sig[i_pks+1])
 
-    return list(cleaned_sig), list(i_pks), list(sig)
+    return cleaned_sig, i_pks, np.asarray(sig)
 
 def _order_cut_plot(input_sig, freqs, Pxx, orders, input_to_hz=1/60, input_unit='rpm', y_label=None):
     """Returns a figure with suplots of order cuts.
@@ -391,21 +571,24 @@ def _order_cut_plot(input_sig, freqs, Pxx, orders, input_to_hz=1/60, input_unit=
         figure with suplots of order cuts
 
     """
+    input_sig = np.asarray(input_sig)
+    freqs = np.asarray(freqs)
+    Pxx = np.asarray(Pxx)
+
     fig, axes = plt.subplots(nrows=len(orders))
     for ax, order in zip(axes, orders):
 
-        # Get the speeds that keep this order within the range in freqs
-        speeds_in_range = [speed for speed in input_sig if min(freqs) <= speed*input_to_hz*order <= max(freqs)]
-
         # Get the order frequencies
-        order_freqs = [speed*input_to_hz*order for speed in speeds_in_range]
+        order_freqs = input_sig*(input_to_hz*order)
 
-        i_freqs = [_find_nearest(freqs, f) for f in order_freqs]
+        # Get the time bins that keep this order within the range in freqs
+        i_bins = np.flatnonzero((freqs[0] <= order_freqs) & (order_freqs <= freqs[-1]))
+        i_freqs = _find_nearest(freqs, order_freqs[i_bins])
         
         # Get the order amplitudes
-        amp = [Pxx[i][j] for i,j in zip(i_freqs, range(len(speeds_in_range)))]
+        amp = Pxx[i_freqs, i_bins]
         
-        ax.plot(speeds_in_range, amp)
+        ax.plot(input_sig[i_bins], amp)
         ax.set_xlabel(input_unit)
 
         if y_label is not None:
@@ -420,9 +603,28 @@ def _order_cut_plot(input_sig, freqs, Pxx, orders, input_to_hz=1/60, input_unit=
     return fig
 
 def _find_nearest(array, value):
+    """Returns the index of the element of `array` nearest to each element of `value`.
+
+    Parameters
+    ----------
+    array : list
+        Values to search. Must be sorted in ascending order.
+    value : float or list
+        Value(s) to find
+
+    Returns
+    -------
+    int or ndarray
+        Index (or indices) of the nearest element(s) of `array`
+
+    """
     array = np.asarray(array)
-    idx = (np.abs(array - value)).argmin()
-    return idx
+    value = np.asarray(value)
+    idx = np.clip(np.searchsorted(array, value), 1, len(array)-1)
+    idx -= (value - array[idx-1]) <= (array[idx] - value)
+
+    # Keep single element arrays in range
+    return np.clip(idx, 0, len(array)-1)
 
 def remove_data_point(x, y, i):
     """Removes the data point at index `i` and replaces it with a linear interpolation between the neighboring points.
@@ -4,6 +4,7 @@
 import csv
 import os
 import re
+from itertools import chain
 from numbers import Number
 from pathlib import Path
 from subprocess import Popen
@@ -13,6 +14,9 @@ import pandas as pd
 
 from scipy.io import loadmat
 
+# Ordinal suffixes indexed by last digit. 11, 12 and 13 are exceptions
+_SUFFIXES = ('th', 'st', 'nd', 'rd', 'th', 'th', 'th', 'th', 'th', 'th')
+_TEENS = {11, 12, 13}
 
 def open_in_explorer(path: os.PathLike) -> None:
     if Path(path).is_dir():
@@ -29,7 +33,7 @@ def num_to_ith(num):
     Parameters
     ----------
     num : int
-        Number
+        Number (floats are truncated to an int)
 
     Returns
     -------
@@ -37,30 +41,18 @@ def num_to_ith(num):
         Ordinal number
 
     """
+    num = int(num)
+
     if num == -1:
         return 'last'
-    elif num < -1:
-        value = str(num+1).replace('-', '')
-    else:
-        value = str(num)
-
-    last_digit = value[-1]
-
-    if len(value) > 1 and value[-2] == '1':
-        suffix = 'th'
-    elif last_digit == '1':
-        suffix = 'st'
-    elif last_digit == '2':
-        suffix = 'nd'
-    elif last_digit == '3':
-        suffix = 'rd'
-    else:
-        suffix = 'th'
+
+    n = abs(num+1) if num < -1 else num
+    suffix = 'th' if n % 100 in _TEENS else _SUFFIXES[n % 10]
 
     if num < -1:
         suffix += ' to last'
 
-    return value + suffix
+    return f'{n}{suffix}'
 
 
 def num_to_str(num: Number,
@@ -131,31 +123,22 @@ def read_data_string(text, delimiter=',', newline='\n', has_headerline=True):
         A list of dictionaries containing the data from `text`
 
     """
-    lines = text.split(newline)
+    # Split each line once. Quotes are not treated specially
+    rows = (line.split(delimiter) for line in text.split(newline))
 
     # Generate headers
     if has_headerline:
         # If the text has headerlines, get them
-        headers = lines.pop(0).split(delimiter)
+        headers = next(rows, [])
 
     else:
         # If the text doesn't have headerlines, make generic ones
-        headers = [str(i+1) for i in range(len(lines[0].split(delimiter)))]
-
-    data = []
-    for line in lines:
-        # For each line, check if data is missing
-
-        if len(line.split(delimiter)) == len(headers):
-            # If there is no missing data on this line, initialize a dictionary for the line data
-            line_data = {}
-
-            for header, value in zip(headers, line.split(delimiter)):
-                # For each column in the line, add to the line_data dict (header as key and value as value)
-                line_data[header] = value
+        first_row = next(rows, [])
+        headers = [str(i+1) for i in range(len(first_row))]
+        rows = chain([first_row], rows)
 
-            # Append the line_data dict to the data list
-            data.append(line_data)
+    # Skip any lines with missing data
+    data = [dict(zip(headers, row)) for row in rows if len(row) == len(headers)]
 
     return data
 